@@ -6,6 +6,12 @@
 ############################################
 
 import sqlite3
+import csv
+import html
+import heapq
+import itertools
+import math
+from collections import Counter
 
 ######################
 # CUSTOM OBJECTS 
@@ -94,6 +100,277 @@ class Game:
         )
 
 
+# In-memory trigram index of the words in player names for typo-tolerant search
+class PlayerNameIndex:
+
+    # Number of similar words looked up for each typed word
+    WORD_MATCHES = 5
+
+    # Similarities tried before min_similarity, to skip scanning loosely similar words
+    QUICK_SIMILARITIES = (0.5, 0.35)
+
+    # SELF
+    def __init__(self):
+        self.names = {}
+        self.word_ids = {}
+        self.word_sizes = {}
+        self.trigrams = {}
+
+    # Split a name into its lowercase words
+    @staticmethod
+    def get_words(name):
+        return set((name or "").lower().split())
+
+    # Split a word into trigrams, padded so short words still match
+    @staticmethod
+    def get_trigrams(word):
+        padded = f"  {word} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    # SETTERS
+    def add(self, player_id, name):
+        self.names[player_id] = name or ""
+        for word in self.get_words(name):
+            ids = self.word_ids.get(word)
+
+            # Only words not seen before go into the trigram index
+            if ids is None:
+                ids = self.word_ids[word] = set()
+                word_trigrams = self.get_trigrams(word)
+                self.word_sizes[word] = len(word_trigrams)
+                for trigram in word_trigrams:
+                    self.trigrams.setdefault(trigram, set()).add(word)
+
+            ids.add(player_id)
+
+    def remove(self, player_id):
+        name = self.names.pop(player_id, None)
+        if name is None:
+            return
+        for word in self.get_words(name):
+            ids = self.word_ids.get(word)
+            if ids is None:
+                continue
+            ids.discard(player_id)
+
+            # Drop words no player has anymore
+            if not ids:
+                del self.word_ids[word]
+                del self.word_sizes[word]
+                for trigram in self.get_trigrams(word):
+                    words = self.trigrams.get(trigram)
+                    if words is not None:
+                        words.discard(word)
+                        if not words:
+                            del self.trigrams[trigram]
+
+    # SEARCH
+    # Return (similarity, word) pairs for the known words most similar to word
+    def search_words(self, word, min_similarity):
+        query = self.get_trigrams(word)
+        postings = sorted((self.trigrams.get(trigram, set()) for trigram in query), key = len)
+
+        # Try high similarities first: a word needs at least needed shared trigrams to
+        # reach one, so it must be in one of the rarest len(query) - needed + 1 trigrams.
+        # Close matches are enough, so looser words are only scanned when there are none.
+        thresholds = [threshold for threshold in self.QUICK_SIMILARITIES if threshold > min_similarity]
+        for threshold in thresholds + [min_similarity]:
+            needed = max(1, math.ceil(threshold * len(query)))
+            candidates = set().union(*postings[:len(query) - needed + 1])
+
+            # Count the trigrams each candidate shares with word
+            shared = Counter()
+            for ids in postings:
+                shared.update(candidates.intersection(ids))
+
+            # Jaccard similarity of the two trigram sets
+            matches = []
+            sizes = self.word_sizes
+            query_size = len(query)
+            for known_word, count in shared.items():
+                if count >= needed:
+                    similarity = count / (query_size + sizes[known_word] - count)
+                    if similarity >= threshold:
+                        matches.append((similarity, known_word))
+
+            if matches:
+                break
+
+        return heapq.nlargest(self.WORD_MATCHES, matches)
+
+    # Return (id, name) pairs of the players whose name words best match the words of text
+    def search(self, text, limit = 10, min_similarity = 0.25):
+
+        # For each typed word, the players having each similar known word
+        matches_by_word = []
+        for word in self.get_words(text):
+            matches = [(similarity, self.word_ids[known_word]) for similarity, known_word in self.search_words(word, min_similarity)]
+            if matches:
+                matches_by_word.append(matches)
+
+        if not matches_by_word:
+            return []
+
+        # Group players by score, so only the best groups need sorting
+        groups = {}
+        common = set()
+        if len(matches_by_word) > 1:
+            common = set().union(*(ids for similarity, ids in matches_by_word[0]))
+            for matches in matches_by_word[1:]:
+                common &= set().union(*(ids for similarity, ids in matches))
+
+        if common:
+            # Split the players matching every typed word into levels by their best
+            # similarity to each typed word (matches come best first)
+            levels_by_word = []
+            for matches in matches_by_word:
+                levels = []
+                assigned = set()
+                for similarity, ids in matches:
+                    level = (ids & common) - assigned
+                    if level:
+                        levels.append((similarity, level))
+                        assigned |= level
+                levels_by_word.append(levels)
+
+            # Players in one level of every typed word score the sum of those similarities
+            for combination in itertools.product(*levels_by_word):
+                ids = set.intersection(*(level for similarity, level in combination))
+                if ids:
+                    groups.setdefault(sum(similarity for similarity, level in combination), []).append(ids)
+        else:
+            # Otherwise players score the similarity of their best matching word
+            for matches in matches_by_word:
+                for similarity, ids in matches:
+                    groups.setdefault(similarity, []).append(ids)
+
+        # Best score first, lowest ID first among ties
+        results = []
+        taken = set()
+        for score in sorted(groups, reverse = True):
+            best = sorted(set().union(*groups[score]) - taken)[:limit - len(results)]
+            results.extend(best)
+            taken.update(best)
+            if len(results) >= limit:
+                break
+
+        return [(player_id, self.names[player_id]) for player_id in results]
+
+
+# Achievement earned when a player makes length streak_events in a row
+# (events in break_events end the streak, any other event is ignored)
+class StreakRule:
+
+    # SELF
+    def __init__(self, name, streak_events, break_events, length):
+        self.name = name
+        self.streak_events = frozenset(streak_events)
+        self.break_events = frozenset(break_events)
+        self.length = length
+
+    # GETTERS
+    def get_name(self):
+        return self.name
+
+    def get_events(self):
+        return self.streak_events | self.break_events
+
+    # Starting streak of a player
+    def get_initial_state(self, player_id, career_counters):
+        return 0
+
+    # Return the new streak and whether it just reached the target length
+    def advance(self, streak, event):
+        if event in self.streak_events:
+            streak += 1
+            return streak, streak == self.length
+        return 0, False
+
+# Achievement earned when a player's career total of a stat reaches threshold
+class CareerMilestoneRule:
+
+    # SELF
+    def __init__(self, name, event, column, threshold):
+        self.name = name
+        self.event = event
+        self.column = column
+        self.threshold = threshold
+
+    # GETTERS
+    def get_name(self):
+        return self.name
+
+    def get_events(self):
+        return {self.event}
+
+    def get_column(self):
+        return self.column
+
+    # Starting total of a player, from the counters loaded when the game started
+    # (0 if the player's row was missing then)
+    def get_initial_state(self, player_id, career_counters):
+        return career_counters.get(player_id, {}).get(self.column, 0)
+
+    # Return the new total and whether it just reached the threshold
+    def advance(self, total, event):
+        total += 1
+        return total, total == self.threshold
+
+# Achievement engine: evaluates rules incrementally as moves are added and undone
+class AchievementEngine:
+
+    # SELF
+    def __init__(self, rules, career_counters):
+        self.career_counters = career_counters
+        self.states = {}
+        self.history = []
+        self.achievements = []
+
+        # Only the rules that care about an event run when it happens
+        self.rules_by_event = {}
+        for rule in rules:
+            for event in rule.get_events():
+                self.rules_by_event.setdefault(event, []).append(rule)
+
+    # GETTERS
+    def get_achievements(self):
+        return self.achievements
+
+    # SETTERS
+    # Update every rule watching the move's event and return the achievements it earned
+    def add_move(self, move):
+        player_id = move.get_player_id()
+        event = move.get_action().lower()
+        changes = []
+        earned = []
+
+        for rule in self.rules_by_event.get(event, ()):
+            key = (rule, player_id)
+            state = self.states.get(key)
+            if state is None:
+                state = rule.get_initial_state(player_id, self.career_counters)
+
+            new_state, achieved = rule.advance(state, event)
+            self.states[key] = new_state
+            changes.append((key, state))
+
+            if achieved:
+                earned.append((player_id, move.get_player_name(), rule.get_name()))
+
+        # Remember what changed so the move can be undone
+        self.history.append((changes, len(earned)))
+        self.achievements.extend(earned)
+        return earned
+
+    # Restore the rule states from before the last move and drop what it earned
+    def undo_move(self):
+        changes, num_earned = self.history.pop()
+        for key, state in changes:
+            self.states[key] = state
+        if num_earned:
+            del self.achievements[-num_earned:]
+
+
 ######################
 # CUSTOM ERRORS 
 ######################
@@ -118,6 +395,14 @@ class InvalidEventError(Exception):
 class GameCannotEndTied(Exception):
     pass
 
+# Raised when a typed player name matches more than one player
+class PlayerNameNotUniqueError(Exception):
+    pass
+
+# Raised when user selects a report format that does not exist
+class InvalidReportFormatError(Exception):
+    pass
+
 
 ######################
 # DATABASE CONNECTION
@@ -157,8 +442,24 @@ def create_table(connection):
         )
     '''
 
+    # Case-insensitive index used by prefix name search
+    create_index_func = "CREATE INDEX IF NOT EXISTS idx_players_name ON Players (name COLLATE NOCASE)"
+
+    # Achievements earned by players, written when a game ends
+    create_achievements_func = '''
+        CREATE TABLE IF NOT EXISTS Achievements (
+            id              INTEGER PRIMARY KEY,
+            player_id       INTEGER,
+            name            TEXT
+        )
+    '''
+    create_achievements_index_func = "CREATE INDEX IF NOT EXISTS idx_achievements_player ON Achievements (player_id)"
+
     cursor = connection.cursor()
     cursor.execute(create_table_func)
+    cursor.execute(create_index_func)
+    cursor.execute(create_achievements_func)
+    cursor.execute(create_achievements_index_func)
     connection.commit()
 
 
@@ -184,6 +485,18 @@ def display_players(connection, arr):
     for player in players:
         print(f"ID: {player[0]}, Name: {player[1]}")
 
+# Largest roster printed in full before a player prompt
+MAX_DISPLAYED_PLAYERS = 50
+
+# Print the players only when the roster is short enough to read, otherwise point to name search
+def display_players_if_short(connection, arr):
+
+    # Stop counting once the roster is too long, instead of scanning every player
+    if get_num_players(connection, arr, MAX_DISPLAYED_PLAYERS + 1) <= MAX_DISPLAYED_PLAYERS:
+        display_players(connection, arr)
+    else:
+        print("Too many players to list. Type part of a name to search, or use 'view' to list everyone.")
+
 # Print the events
 def display_events(connection):
 
@@ -232,7 +545,7 @@ def print_game_players(connection, game):
 ######################
 
 # Insert a new player into the Players table
-def add_player(connection, name):
+def add_player(connection, name, name_index = None):
 
     add_player_func = '''
         INSERT INTO Players (name)
@@ -243,20 +556,30 @@ def add_player(connection, name):
     cursor.execute(add_player_func, (name,))
     connection.commit()
 
+    # Keep the name search index in sync
+    if name_index is not None:
+        name_index.add(cursor.lastrowid, name)
+
 # Delete a player from the Players table
-def delete_player(connection, player_id):
+def delete_player(connection, player_id, name_index = None):
     
     # Validate user input
     does_player_id_exist(connection, player_id)
     
     delete_func = "DELETE FROM Players WHERE id = ?"
+    delete_achievements_func = "DELETE FROM Achievements WHERE player_id = ?"
 
     cursor = connection.cursor()
     cursor.execute(delete_func, (player_id,))
+    cursor.execute(delete_achievements_func, (player_id,))
     connection.commit()
 
+    # Keep the name search index in sync
+    if name_index is not None:
+        name_index.remove(player_id)
+
 # Update a stat in the Players table
-def update_stat(connection, id, event, amt):
+def update_stat(connection, id, event, amt, commit = True):
 
     # Get column_name from user input
     stat = get_column_name_by_event(connection, event)
@@ -266,12 +589,13 @@ def update_stat(connection, id, event, amt):
 
         cursor = connection.cursor()
         cursor.execute(update_func, (id,))
-        connection.commit()
+        if commit:
+            connection.commit()
     else:
         print(f"{event} could not be found.")
 
 # Update a stat in the Players table
-def update_w_l(connection, id, outcome):
+def update_w_l(connection, id, outcome, commit = True):
 
     # Get column name
     if outcome == 'w':
@@ -283,9 +607,11 @@ def update_w_l(connection, id, outcome):
 
     cursor = connection.cursor()
     cursor.execute(update_func, (id,))
-    connection.commit()
+    if commit:
+        connection.commit()
 
-def update_totals(connection, id):
+# Update the games, tosses and tosses defended totals in the Players table
+def update_totals(connection, id, commit = True):
 
     # Add one game played
     update_games_func = f"UPDATE Players SET games = wins + losses WHERE id = ?"
@@ -301,7 +627,62 @@ def update_totals(connection, id):
     cursor.execute(update_games_func, (id,))
     cursor.execute(update_off_totals_func, (id,))
     cursor.execute(update_def_totals_func, (id,))
-    connection.commit()
+    if commit:
+        connection.commit()
+
+# Record an achievement earned by a player
+def add_achievement(connection, player_id, name, commit = True):
+
+    add_achievement_func = "INSERT INTO Achievements (player_id, name) VALUES (?, ?)"
+
+    cursor = connection.cursor()
+    cursor.execute(add_achievement_func, (player_id, name))
+    if commit:
+        connection.commit()
+
+# Write the stats and achievements of a finished game in a single transaction
+def finalize_game(connection, game, winning_team, achievements = ()):
+
+    try:
+        # Update player stats by iterating thru all plays in game
+        for play in game.get_plays():
+            curr_player_id = play.get_player_id()
+            curr_event = play.get_action()
+
+            # Update individual statistics
+            update_stat(connection, curr_player_id, curr_event, 1, commit = False)
+
+        # Update wins and losses
+        # If Team 1 wins
+        if winning_team == 1:
+            update_w_l(connection, game.get_player_array()[0], 'w', commit = False)
+            update_w_l(connection, game.get_player_array()[1], 'w', commit = False)
+
+            update_w_l(connection, game.get_player_array()[2], 'l', commit = False)
+            update_w_l(connection, game.get_player_array()[3], 'l', commit = False)
+
+        # If Team 2 wins
+        else:
+            update_w_l(connection, game.get_player_array()[0], 'l', commit = False)
+            update_w_l(connection, game.get_player_array()[1], 'l', commit = False)
+
+            update_w_l(connection, game.get_player_array()[2], 'w', commit = False)
+            update_w_l(connection, game.get_player_array()[3], 'w', commit = False)
+
+        # Update totals (games, tosses, tosses defended)
+        for player_id in game.get_player_array():
+            update_totals(connection, player_id, commit = False)
+
+        # Record achievements earned during the game
+        for player_id, player_name, name in achievements:
+            add_achievement(connection, player_id, name, commit = False)
+
+        connection.commit()
+
+    except sqlite3.Error:
+        # Leave the Players and Achievements tables untouched if any write fails
+        connection.rollback()
+        raise
 
 # View the stats of an existing player
 def view_player_stats(connection, player_id):
@@ -338,6 +719,12 @@ def view_player_stats(connection, player_id):
         else:
             print(f"Column '{column_name}' not found in result set description.")
 
+    # Print the player's achievements
+    cursor.execute("SELECT name, COUNT(*) FROM Achievements WHERE player_id = ? GROUP BY name ORDER BY MIN(id)", (player_id,))
+    achievements = cursor.fetchall()
+    if achievements:
+        print("Achievements: " + ", ".join(f"{name} (x{count})" if count > 1 else name for name, count in achievements))
+
 # Determine points scored by an event
 def determine_points(event):
     
@@ -421,20 +808,93 @@ def get_available_players(connection, arr):
     # Fetch the result
     return cursor.fetchall()
 
-# Get the number of existing players
-def get_num_players(connection, arr):
+# Get the number of existing players (counting at most limit players, if given)
+def get_num_players(connection, arr, limit = None):
     cursor = connection.cursor()
 
     # Construct a parameterized query to retrieve players excluding those in arr
-    query = "SELECT COUNT(*) FROM Players WHERE id NOT IN ({})"
+    query = "SELECT COUNT(*) FROM (SELECT 1 FROM Players WHERE id NOT IN ({}) LIMIT ?)"
     formatted_ids = ', '.join(map(str, arr))
-    cursor.execute(query.format(formatted_ids))
+    cursor.execute(query.format(formatted_ids), (-1 if limit is None else limit,))
 
     # Fetch the result
     num_players = cursor.fetchone()[0]
     return num_players
 
 
+# Number of players returned by a name search
+SEARCH_LIMIT = 10
+
+# Number of rows pulled from the cursor at a time when building the name search index
+NAME_INDEX_BATCH_SIZE = 1000
+
+# Build the name search index from the Players table.
+# The index lives in this process only: players added or deleted by another
+# scorekeeper sharing the database are not in it until the program restarts.
+def load_player_name_index(connection):
+
+    name_index = PlayerNameIndex()
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT id, name FROM Players")
+    while True:
+        players = cursor.fetchmany(NAME_INDEX_BATCH_SIZE)
+        if not players:
+            break
+        for player_id, name in players:
+            name_index.add(player_id, name)
+
+    return name_index
+
+# Get players whose name starts with text (case-insensitive), using the name index
+def get_players_by_name_prefix(connection, text, arr, limit = SEARCH_LIMIT):
+
+    cursor = connection.cursor()
+
+    # A range on the NOCASE index instead of LIKE, so names need no escaping
+    query = '''
+        SELECT id, name
+        FROM Players
+        WHERE name COLLATE NOCASE >= ? AND name COLLATE NOCASE < ?
+          AND id NOT IN ({})
+        ORDER BY name COLLATE NOCASE, id
+        LIMIT ?
+    '''
+    formatted_ids = ', '.join(map(str, arr))
+    cursor.execute(query.format(formatted_ids), (text, text + "\U0010ffff", limit))
+
+    return cursor.fetchall()
+
+# Get typo-tolerant name matches from the name search index
+def get_players_by_similar_name(connection, text, arr, name_index, limit = SEARCH_LIMIT):
+
+    # Ask for extra matches so excluded players do not crowd out the rest
+    fuzzy_ids = [player_id for player_id, name in name_index.search(text, limit + len(arr)) if player_id not in arr][:limit]
+    if not fuzzy_ids:
+        return []
+
+    # Re-read the matches, so players deleted by another scorekeeper are left out
+    cursor = connection.cursor()
+    query = "SELECT id, name FROM Players WHERE id IN ({})"
+    cursor.execute(query.format(', '.join(map(str, fuzzy_ids))))
+    players = dict(cursor.fetchall())
+
+    return [(player_id, players[player_id]) for player_id in fuzzy_ids if player_id in players]
+
+# Search players by name: prefix matches first, then typo-tolerant matches (if a name index is given)
+def search_players(connection, text, arr, name_index = None, limit = SEARCH_LIMIT):
+
+    text = text.strip()
+    if not text:
+        return []
+
+    matches = get_players_by_name_prefix(connection, text, arr, limit)
+    if matches or name_index is None:
+        return matches
+
+    return get_players_by_similar_name(connection, text, arr, name_index, limit)
+
+
 ######################
 # VALIDATORS
 ######################
@@ -450,33 +910,69 @@ def does_player_id_exist(connection, player_id):
     if not exists:
         raise PlayerNotFoundError(f"Player with ID {player_id} not found in the Players table.")
 
+# Get a Player ID from user input that is either an ID or (part of) a name.
+# With allow_similar = False only exact names and unique prefixes are accepted,
+# and similar names are listed instead of picked.
+def get_player_id_from_input(connection, user_input, arr, name_index = None, allow_similar = True):
+
+    # Numeric input is a Player ID
+    try:
+        return int(user_input)
+    except ValueError:
+        pass
+
+    if allow_similar:
+        matches = search_players(connection, user_input, arr, name_index)
+    else:
+        matches = get_players_by_name_prefix(connection, user_input.strip(), arr)
+
+    if not matches:
+        similar = []
+        if not allow_similar and name_index is not None and user_input.strip():
+            similar = get_players_by_similar_name(connection, user_input.strip(), arr, name_index)
+
+        if similar:
+            options = "\n".join(f"ID: {player[0]}, Name: {player[1]}" for player in similar)
+            raise PlayerNotFoundError(f"No player found matching '{user_input.strip()}'. Similar names:\n{options}\nPlease type the ID of the player.")
+        raise PlayerNotFoundError(f"No player found matching '{user_input.strip()}'.")
+
+    # An exact name wins over longer names that share the prefix
+    exact = [player for player in matches if player[1].lower() == user_input.strip().lower()]
+    if len(exact) == 1:
+        return exact[0][0]
+    if len(matches) == 1:
+        return matches[0][0]
+
+    options = "\n".join(f"ID: {player[0]}, Name: {player[1]}" for player in matches)
+    raise PlayerNameNotUniqueError(f"More than one player matches '{user_input.strip()}':\n{options}\nPlease type the ID of the player.")
+
 
 # Get a valid player ID from the user
-def get_valid_player_id(connection, game, team):
+def get_valid_player_id(connection, game, team, name_index = None):
+
+    display_players_if_short(connection, game.get_player_array())
 
     while True:
-        display_players(connection, game.get_player_array())
         curr_player_index = len(game.get_player_array())
-        user_input = input(f"Type the number of Player {curr_player_index + 1} (Team {team}): ")
+        user_input = input(f"Type the number or name of Player {curr_player_index + 1} (Team {team}): ")
         
         try:
-            player_number = int(user_input)
+            # A wrong pick sends the whole game's stats to the wrong player, so similar names are only listed
+            player_number = get_player_id_from_input(connection, user_input, game.get_player_array(), name_index, allow_similar = False)
 
             # Check if the entered player number is an available option
-            available_players = [player[0] for player in get_available_players(connection, game.get_player_array())]
-            if player_number not in available_players:
-                raise PlayerNotFoundError(f"Player with ID {player_number} is not available.")
+            does_player_id_exist(connection, player_number)
 
-            # Update player_array if valid Player ID
+            # Update player_array if valid Player ID (raises if the player was already picked)
             game.update_player_array(player_number, game.get_player_array())
             break
         
         except PlayerAlreadyInGameError as e:
             print(e)
-        except ValueError:
-            print("Invalid input. Please type a number.")
         except PlayerNotFoundError as e:
             print(e)
+        except PlayerNameNotUniqueError as e:
+            print(e)
 
     return player_number
 
@@ -509,23 +1005,70 @@ def get_valid_event(connection):
                 print(e)
 
 
+######################
+# ACHIEVEMENTS
+######################
+
+CATCH_EVENTS = ("1 point catch", "2 point catch")
+DROP_EVENTS = ("1 point drop", "2 point drop")
+SCORING_TOSS_EVENTS = ("1 pointer", "2 pointer", "sink")
+MISSED_TOSS_EVENTS = ("airball", "short toss", "table hit", "cup hit")
+
+# Rules checked on every move of a game
+ACHIEVEMENT_RULES = [
+    StreakRule("Sticky Hands (3 catches in a row)", CATCH_EVENTS, DROP_EVENTS, 3),
+    StreakRule("Brick Wall (5 catches in a row)", CATCH_EVENTS, DROP_EVENTS, 5),
+    StreakRule("Heating Up (3 scoring tosses in a row)", SCORING_TOSS_EVENTS, MISSED_TOSS_EVENTS, 3),
+    StreakRule("On Fire (5 scoring tosses in a row)", SCORING_TOSS_EVENTS, MISSED_TOSS_EVENTS, 5),
+    StreakRule("Back-to-Back Sinks", ("sink",), SCORING_TOSS_EVENTS[:2] + MISSED_TOSS_EVENTS, 2),
+    StreakRule("FIFA Run (3 successful FIFAs in a row)", ("successful fifa",), ("unsuccessful fifa",), 3),
+    CareerMilestoneRule("First Career Sink", "sink", "sinks", 1),
+    CareerMilestoneRule("10th Career Sink", "sink", "sinks", 10),
+    CareerMilestoneRule("100th Career Sink", "sink", "sinks", 100),
+    CareerMilestoneRule("100th Career 2-Pointer", "2 pointer", "pts2", 100),
+    CareerMilestoneRule("100th Career 1-Point Catch", "1 point catch", "catch1s", 100),
+    CareerMilestoneRule("50th Career Successful FIFA", "successful fifa", "fifa_succs", 50),
+]
+
+# Create an achievement engine for a game, loading the career counters of its players once
+def start_achievement_engine(connection, game, rules = ACHIEVEMENT_RULES):
+
+    columns = sorted({rule.get_column() for rule in rules if isinstance(rule, CareerMilestoneRule)})
+    career_counters = {player_id: {} for player_id in game.get_player_array()}
+
+    if columns:
+        cursor = connection.cursor()
+
+        query = "SELECT id, {} FROM Players WHERE id IN ({})"
+        formatted_ids = ', '.join(map(str, game.get_player_array()))
+        cursor.execute(query.format(', '.join(columns), formatted_ids))
+
+        for player in cursor.fetchall():
+            career_counters[player[0]] = dict(zip(columns, player[1:]))
+
+    return AchievementEngine(rules, career_counters)
+
+
 ######################
 # GAMEPLAY
 ######################
-def start_game(connection):
+def start_game(connection, name_index = None):
 
     game = Game()
 
     # Get players for Team 1
-    get_valid_player_id(connection, game, 1)
-    get_valid_player_id(connection, game, 1)
+    get_valid_player_id(connection, game, 1, name_index)
+    get_valid_player_id(connection, game, 1, name_index)
 
     # Get players for Team 2
-    get_valid_player_id(connection, game, 2)
-    get_valid_player_id(connection, game, 2)
+    get_valid_player_id(connection, game, 2, name_index)
+    get_valid_player_id(connection, game, 2, name_index)
 
     # Do not ever call get_valid_player_id() more than 4 times
 
+    # Watch for streaks and milestones as moves are added
+    achievement_engine = start_achievement_engine(connection, game)
+
     prompt = "Would you like to add a move (move), undo a move (undo), or end the game (gameover): "
     
     while True:
@@ -561,12 +1104,16 @@ def start_game(connection):
             print(new_move)
             game.add_move(new_move)
             game.update_score(team_number, points_scored)
+
+            for player_id, player_name, achievement in achievement_engine.add_move(new_move):
+                print(f"Achievement unlocked! {player_name}: {achievement}")
             print(game, '\n')
 
         elif user_input == "undo":
 
             if game.get_plays():
                 undid = game.undo_move()
+                achievement_engine.undo_move()
 
                 undo_player = undid.get_player_id()
                 undo_team = get_team_by_id(undo_player, game.get_player_array())
@@ -592,34 +1139,7 @@ def start_game(connection):
 Press any key to end game. (If you want to continue the game, type 'cancel'.)''')
                 if new_input != "cancel":
 
-                    # When game is over, update player stats by iterating thru all plays in game
-                    for play in game.get_plays():
-                        curr_player_id = play.get_player_id()
-                        curr_event = play.get_action()
-
-                        # Update individual statistics
-                        update_stat(connection, curr_player_id, curr_event, 1)
-
-                    # Update wins and losses
-                    # If Team 1 wins                    
-                    if winning_team == 1:
-                        update_w_l(connection, game.get_player_array()[0], 'w')
-                        update_w_l(connection, game.get_player_array()[1], 'w')
-
-                        update_w_l(connection, game.get_player_array()[2], 'l')
-                        update_w_l(connection, game.get_player_array()[3], 'l')
-                    
-                    # If Team 2 wins
-                    else:
-                        update_w_l(connection, game.get_player_array()[0], 'l')
-                        update_w_l(connection, game.get_player_array()[1], 'l')
-
-                        update_w_l(connection, game.get_player_array()[2], 'w')
-                        update_w_l(connection, game.get_player_array()[3], 'w')
-
-                    # Update totals (games, tosses, tosses defended)
-                    for player_id in game.get_player_array():
-                        update_totals(connection, player_id)
+                    finalize_game(connection, game, winning_team, achievement_engine.get_achievements())
 
                     print("Gameover\n")
                     break
@@ -627,11 +1147,125 @@ Press any key to end game. (If you want to continue the game, type 'cancel'.)'''
             except GameCannotEndTied as e:
                 print(f"Error: {e}")
 
+            # Keep the game (e.g. when another scorekeeper holds the database lock) so gameover can be retried
+            except sqlite3.OperationalError as e:
+                print(f"Error: {e}. The game was not saved. Type gameover to try again.")
+
             
         else:
             print(f"{user_input} is not a valid command. Please type move, undo, or gameover.")
 
 
+######################
+# REPORTS
+######################
+
+# Number of rows pulled from the cursor at a time when building a report
+REPORT_BATCH_SIZE = 1000
+
+# Supported report formats
+REPORT_FORMATS = ("csv", "md", "html")
+
+# Divide two stats, returning 0 when the denominator is 0
+def safe_rate(numerator, denominator):
+
+    if denominator:
+        return round(numerator / denominator, 3)
+    else:
+        return 0
+
+# Get the report header (Player ID, name, every description, derived rates)
+def get_report_header(connection):
+
+    cursor = connection.cursor()
+
+    query = "SELECT column_name, description FROM ColumnInformation ORDER BY id"
+    cursor.execute(query)
+    columns = cursor.fetchall()
+
+    # Totals are kept in Players but are not described in ColumnInformation
+    columns += [("tosses", "Tosses"), ("tosses_defended", "Tosses defended"),
+                ("wins", "Wins"), ("losses", "Losses"), ("games", "Games")]
+
+    descriptions = [description for column_name, description in columns]
+    descriptions += ["Win rate", "Points per game", "Sink rate", "Catch rate"]
+
+    return [column_name for column_name, description in columns], descriptions
+
+# Yield one report row per player, fetching players from the database in batches
+def generate_report_rows(connection, column_names, batch_size = REPORT_BATCH_SIZE):
+
+    # Use a separate cursor so the caller's cursor is left untouched
+    cursor = connection.cursor()
+
+    query = "SELECT {} FROM Players ORDER BY id".format(', '.join(column_names))
+    cursor.execute(query)
+
+    while True:
+        players = cursor.fetchmany(batch_size)
+        if not players:
+            break
+
+        for player in players:
+            stats = dict(zip(column_names, player))
+            points = stats["pts1"] + 2 * stats["pts2"] + 3 * stats["sinks"] + stats["fifa_succs"]
+            catches = stats["catch1s"] + stats["catch2s"]
+
+            yield list(player) + [
+                safe_rate(stats["wins"], stats["games"]),
+                safe_rate(points, stats["games"]),
+                safe_rate(stats["sinks"], stats["tosses"]),
+                safe_rate(catches, stats["tosses_defended"]),
+            ]
+
+# Write report rows as CSV
+def write_csv_report(file, header, rows):
+
+    writer = csv.writer(file)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+
+# Write report rows as a Markdown table
+def write_md_report(file, header, rows):
+
+    # Escape pipes so header and data cells cannot split the table
+    cells = [str(value).replace("|", "\\|") for value in header]
+    file.write("| " + " | ".join(cells) + " |\n")
+    file.write("|" + "---|" * len(header) + "\n")
+    for row in rows:
+        cells = [str(value).replace("|", "\\|") for value in row]
+        file.write("| " + " | ".join(cells) + " |\n")
+
+# Write report rows as an HTML table
+def write_html_report(file, header, rows):
+
+    file.write("<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>Beer Die Stats</title></head>\n<body>\n<table>\n")
+    file.write("<tr>" + "".join(f"<th>{html.escape(str(value))}</th>" for value in header) + "</tr>\n")
+    for row in rows:
+        file.write("<tr>" + "".join(f"<td>{html.escape(str(value))}</td>" for value in row) + "</tr>\n")
+    file.write("</table>\n</body>\n</html>\n")
+
+# Stream the stat sheet of every player to a file in the selected format
+def write_report(connection, file_name, report_format):
+
+    writers = {
+        "csv": write_csv_report,
+        "md": write_md_report,
+        "html": write_html_report,
+    }
+
+    if report_format not in writers:
+        raise InvalidReportFormatError(f"Invalid report format: {report_format}. Choose from {', '.join(REPORT_FORMATS)}.")
+
+    column_names, header = get_report_header(connection)
+    rows = generate_report_rows(connection, column_names)
+
+    # Rows are written as they are generated, so the whole league is never held in memory
+    with open(file_name, "w", newline="", encoding="utf-8") as file:
+        writers[report_format](file, header, rows)
+
+
 ######################
 # MAIN
 ######################
@@ -647,6 +1281,9 @@ def main():
     # Create the Players table if it doesn't exist
     create_table(connection)
 
+    # Index player names for typo-tolerant search for the rest of this session
+    name_index = load_player_name_index(connection)
+
     # Take command line input from user
 
     print("\nWelcome to the first, only, and best Beer Die Stat Tracker! ")
@@ -656,6 +1293,7 @@ def main():
             Delete a player (delete)
             View existing players (view)
             View player stats (stats)
+            Export a league stat sheet (report)
             Start a game (game)
             Quit (quit)
 '''
@@ -673,30 +1311,40 @@ def main():
         elif user_input.lower() == 'add':
             new_name = input("Enter the name (or type 'cancel'): ")
             if new_name.lower() != "cancel":
-                add_player(connection, new_name)
+                add_player(connection, new_name, name_index)
                 print("Added player", new_name)
-                display_players(connection, [])
+                display_players_if_short(connection, [])
         
         # Delete a player
         elif user_input.lower() == 'delete':
-            display_players(connection, [])
+            display_players_if_short(connection, [])
 
-            # Validate user input (must be integer and a valid Player ID)
+            # Validate user input (must be a valid Player ID or match a player name)
             while True:
-                user_input = input("Type the number of the player you want to delete (or type 'cancel'): ")
+                user_input = input("Type the number or name of the player you want to delete (or type 'cancel'): ")
                 if user_input.lower() == "cancel":
                     break
 
                 try:    
-                    player_id_to_delete = int(user_input)
-                    print(f"Deleted Player {player_id_to_delete} {get_name_by_id(connection, player_id_to_delete)}")
-                    delete_player(connection, player_id_to_delete)
-                    display_players(connection, [])
+                    # Never delete a player picked by a typo-tolerant match
+                    player_id_to_delete = get_player_id_from_input(connection, user_input, [], name_index, allow_similar = False)
+                    does_player_id_exist(connection, player_id_to_delete)
+
+                    # Confirm with user because deleting a player is irreversible
+                    player_name_to_delete = get_name_by_id(connection, player_id_to_delete)
+                    confirm = input(f"Are you sure you want to delete Player {player_id_to_delete} {player_name_to_delete} and all of their stats? Type 'yes' to delete: ")
+                    if confirm.lower() != "yes":
+                        print("Player not deleted.")
+                        break
+
+                    delete_player(connection, player_id_to_delete, name_index)
+                    print(f"Deleted Player {player_id_to_delete} {player_name_to_delete}")
+                    display_players_if_short(connection, [])
                     break
-                except ValueError:
-                    print("Invalid input. Please enter a valid player ID (an integer).")
                 except PlayerNotFoundError as e:
                     print(f"Error: {e}")
+                except PlayerNameNotUniqueError as e:
+                    print(f"Error: {e}")
 
         # View all existing players
         elif user_input.lower() == 'view':
@@ -704,27 +1352,44 @@ def main():
 
         # View stats of an existing player
         elif user_input.lower() == 'stats':
-            display_players(connection, [])
+            display_players_if_short(connection, [])
             while True:
-                curr_player = input("Type the number of the player you want to view the stats of (or type 'cancel'): ")
+                curr_player = input("Type the number or name of the player you want to view the stats of (or type 'cancel'): ")
                 if curr_player.lower() == "cancel":
                     break
 
                 try:
-                    curr_player_id = int(curr_player)
+                    curr_player_id = get_player_id_from_input(connection, curr_player, [], name_index)
                     view_player_stats(connection, curr_player_id)
                     break
-                except ValueError:
-                    print("Invalid input. Please enter a valid player ID (an integer).")
                 except PlayerNotFoundError as e:
                     print(f"Error: {e}")
+                except PlayerNameNotUniqueError as e:
+                    print(f"Error: {e}")
                 
+        # Export the stats of every player
+        elif user_input.lower() == 'report':
+            while True:
+                report_format = input(f"Type the report format ({', '.join(REPORT_FORMATS)}) (or type 'cancel'): ").lower()
+                if report_format == "cancel":
+                    break
+
+                try:
+                    file_name = f"stats_report.{report_format}"
+                    write_report(connection, file_name, report_format)
+                    print(f"Wrote league stat sheet to {file_name}")
+                    break
+                except InvalidReportFormatError as e:
+                    print(f"Error: {e}")
+                except OSError as e:
+                    print(f"Error: could not write report: {e}")
+
         # Start a game
         elif user_input.lower() == 'game':
-            if get_num_players(connection, []) < 4:
+            if get_num_players(connection, [], 4) < 4:
                 print("There are not enough players exist to start a game! Please add players before starting a game.")
             
-            else: start_game(connection)
+            else: start_game(connection, name_index)
         
         # Invalid option selected
         else:
@@ -0,0 +1,285 @@
+############################################
+# load_test.py
+# Concurrent scorekeeper load test for the Beer Die Stat Tracker
+#
+# Simulates several scorekeepers playing complete games against one
+# database file and reports throughput, gameover latency, lock waits
+# and "database is locked" errors.
+#
+# Example:
+#   python load_test.py --scorekeepers 8 --games 25 --mode process
+############################################
+
+import argparse
+import math
+import os
+import random
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from die_stats import (
+    Game,
+    Move,
+    GameCannotEndTied,
+    connect_to_database,
+    create_table,
+    add_player,
+    finalize_game,
+    determine_points,
+    start_achievement_engine,
+    get_available_players,
+    get_name_by_id,
+    get_team_by_id,
+)
+
+
+######################
+# SETUP
+######################
+
+# Copy the template database so the load test never touches real stats
+def prepare_database(template_name, database_name, num_players):
+
+    shutil.copyfile(template_name, database_name)
+
+    connection = connect_to_database(database_name)
+    create_table(connection)
+
+    # Make sure there are enough players to fill every game
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Players")
+    existing = cursor.fetchone()[0]
+    for number in range(existing, num_players):
+        add_player(connection, f"Load Test Player {number + 1}")
+
+    connection.close()
+
+# Get every event that can be recorded as a move
+def get_events(database_name):
+
+    connection = connect_to_database(database_name)
+    cursor = connection.cursor()
+    cursor.execute("SELECT event FROM ColumnInformation WHERE event IS NOT NULL AND event != '' ORDER BY id")
+    events = [value[0].lower() for value in cursor.fetchall()]
+    connection.close()
+    return events
+
+# Parse an event mix like "sink=1,airball=5" into event weights
+def parse_event_mix(mix, events):
+
+    weights = {event: 1 for event in events}
+    if not mix:
+        return weights
+
+    weights = {event: 0 for event in events}
+    for item in mix.split(","):
+        event, _, weight = item.partition("=")
+        event = event.strip().lower()
+        if event not in weights:
+            raise argparse.ArgumentTypeError(f"Invalid event in mix: {event}")
+        try:
+            weights[event] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight for {event}: {weight}")
+        if not math.isfinite(weights[event]):
+            raise argparse.ArgumentTypeError(f"Weight for {event} must be a finite number: {weight}")
+        if weights[event] < 0:
+            raise argparse.ArgumentTypeError(f"Weight for {event} cannot be negative: {weight}")
+
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("Event mix must give at least one event a weight above 0.")
+    return weights
+
+
+######################
+# SCOREKEEPER
+######################
+
+# Pause like a scorekeeper typing in the next move
+def think(think_time, rng):
+
+    if think_time > 0:
+        time.sleep(rng.uniform(0, 2 * think_time))
+
+# Play one complete game and write it to the database
+def play_game(connection, options, events, weights, rng, result):
+
+    game = Game()
+
+    # Pick four players at random, like the game setup prompts
+    players = get_available_players(connection, [])
+    for player in rng.sample(players, 4):
+        game.update_player_array(player[0], game.get_player_array())
+
+    # Watch for streaks and milestones, like a real game
+    achievement_engine = start_achievement_engine(connection, game)
+
+    # Add and undo moves
+    for _ in range(options["moves"]):
+        think(options["think_time"], rng)
+
+        if game.get_plays() and rng.random() < options["undo_rate"]:
+            undid = game.undo_move()
+            achievement_engine.undo_move()
+            undo_team = get_team_by_id(undid.get_player_id(), game.get_player_array())
+            game.update_score(undo_team, -determine_points(undid.get_action()))
+            continue
+
+        player_number = rng.randint(1, 4)
+        curr_player_id = game.get_player_array()[player_number - 1]
+        event = rng.choices(events, weights = weights)[0]
+        new_move = Move(curr_player_id, get_name_by_id(connection, curr_player_id), event)
+        game.add_move(new_move)
+        achievement_engine.add_move(new_move)
+        game.update_score(get_team_by_id(curr_player_id, game.get_player_array()), determine_points(event))
+
+    # Break a tie so the game can end
+    try:
+        winning_team = game.get_winning_team()
+    except GameCannotEndTied:
+        curr_player_id = game.get_player_array()[0]
+        new_move = Move(curr_player_id, get_name_by_id(connection, curr_player_id), "1 pointer")
+        game.add_move(new_move)
+        achievement_engine.add_move(new_move)
+        game.update_score(1, 1)
+        winning_team = game.get_winning_team()
+
+    # Gameover, timing how long the write lock takes to get and how long the whole write takes
+    # (a wait that ends in "database is locked" still counts as lock wait)
+    start = time.perf_counter()
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+    finally:
+        result["lock_waits"].append(time.perf_counter() - start)
+    finalize_game(connection, game, winning_team, achievement_engine.get_achievements())
+    result["latencies"].append(time.perf_counter() - start)
+    result["games"] += 1
+
+# Run one simulated scorekeeper (thread or process)
+def run_scorekeeper(number, options, events, weights):
+
+    rng = random.Random(options["seed"] + number)
+    connection = sqlite3.connect(options["database"], timeout = options["timeout"])
+
+    result = {
+        "games": 0,
+        "locked_errors": 0,
+        "other_errors": 0,
+        "latencies": [],
+        "lock_waits": [],
+    }
+
+    # A locked database abandons the game, like a scorekeeper's crashed session would
+    for _ in range(options["games"]):
+        try:
+            play_game(connection, options, events, weights, rng, result)
+        except sqlite3.OperationalError as e:
+            if connection.in_transaction:
+                connection.rollback()
+            if "locked" in str(e) or "busy" in str(e):
+                result["locked_errors"] += 1
+            else:
+                result["other_errors"] += 1
+
+    connection.close()
+    return result
+
+
+######################
+# REPORT
+######################
+
+# Get a percentile from a sorted list of values
+def percentile(values, pct):
+
+    if not values:
+        return 0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+# Print the combined results of every scorekeeper
+def print_results(results, elapsed, options):
+
+    games = sum(result["games"] for result in results)
+    locked_errors = sum(result["locked_errors"] for result in results)
+    other_errors = sum(result["other_errors"] for result in results)
+    attempts = games + locked_errors + other_errors
+    latencies = sorted(value for result in results for value in result["latencies"])
+    lock_waits = sorted(value for result in results for value in result["lock_waits"])
+
+    print(f"Scorekeepers: {options['scorekeepers']} ({options['mode']} mode)")
+    print(f"Games finished: {games} of {attempts} in {elapsed:.2f} s")
+    print(f"Throughput: {games / elapsed if elapsed else 0:.2f} games/s")
+
+    print("Gameover latency (ms):")
+    for pct in (50, 90, 95, 99):
+        print(f"  p{pct}: {percentile(latencies, pct) * 1000:.2f}")
+    print(f"  max: {(latencies[-1] if latencies else 0) * 1000:.2f}")
+
+    print("Lock wait (ms):")
+    print(f"  total: {sum(lock_waits) * 1000:.2f}")
+    for pct in (50, 99):
+        print(f"  p{pct}: {percentile(lock_waits, pct) * 1000:.2f}")
+
+    print(f"'database is locked' errors: {locked_errors} ({locked_errors / attempts * 100 if attempts else 0:.1f}%)")
+    if other_errors:
+        print(f"Other database errors: {other_errors}")
+
+
+######################
+# MAIN
+######################
+
+def main():
+
+    parser = argparse.ArgumentParser(description = "Load test the Beer Die Stat Tracker with simulated scorekeepers.")
+    parser.add_argument("--database", default = "load_test.db", help = "database file the scorekeepers share")
+    parser.add_argument("--template", default = "Stats.db", help = "database copied to --database before the test")
+    parser.add_argument("--scorekeepers", type = int, default = 4, help = "number of simulated scorekeepers")
+    parser.add_argument("--mode", choices = ("thread", "process"), default = "thread")
+    parser.add_argument("--games", type = int, default = 10, help = "games played by each scorekeeper")
+    parser.add_argument("--moves", type = int, default = 30, help = "moves entered in each game")
+    parser.add_argument("--undo-rate", type = float, default = 0.05, help = "chance that a move is an undo")
+    parser.add_argument("--think-time", type = float, default = 0.0, help = "mean seconds between moves")
+    parser.add_argument("--mix", default = "", help = "event weights, e.g. 'sink=1,airball=5' (default: all events equally)")
+    parser.add_argument("--players", type = int, default = 20, help = "minimum number of players in the database")
+    parser.add_argument("--timeout", type = float, default = 5.0, help = "seconds sqlite waits on a locked database")
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    if args.players < 4:
+        parser.error("--players must be at least 4")
+
+    for name, value in (("--scorekeepers", args.scorekeepers), ("--games", args.games), ("--moves", args.moves)):
+        if value < 1:
+            parser.error(f"{name} must be at least 1")
+
+    if os.path.abspath(args.database) == os.path.abspath("Stats.db"):
+        parser.error("refusing to load test the real Stats.db; pass another --database")
+    if os.path.abspath(args.database) == os.path.abspath(args.template):
+        parser.error("--database must not be the same file as --template, or the test writes into the template")
+
+    prepare_database(args.template, args.database, args.players)
+    events = get_events(args.database)
+    try:
+        event_weights = parse_event_mix(args.mix, events)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    weights = [event_weights[event] for event in events]
+
+    options = vars(args)
+    executor_class = ThreadPoolExecutor if args.mode == "thread" else ProcessPoolExecutor
+
+    start = time.perf_counter()
+    with executor_class(max_workers = args.scorekeepers) as executor:
+        futures = [executor.submit(run_scorekeeper, number, options, events, weights)
+                   for number in range(args.scorekeepers)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    print_results(results, elapsed, options)
+
+if __name__ == "__main__":
+    main()